@@ -2,13 +2,17 @@ import asyncio
 import base64
 import io
 import logging
-from datetime import datetime
+import re
+import time
 from typing import Optional
 
 import aiohttp
-import paho.mqtt.client as mqtt
+import aiomqtt
+from cachetools import TTLCache
 from google import genai
+from google.genai import types
 from google.genai.errors import APIError
+from PIL import Image
 from telegram import Update
 from telegram.ext import (
     Application,
@@ -35,10 +39,19 @@ ESP32_CAM_IP = ""
 ESP32_CAM_CAPTURE_PATH = "/capture" 
 
 USE_MQTT_IMAGES = False  
+# кэш ответов Gemini работает только с USE_MQTT_IMAGES: по HTTP каждый вопрос получает новый кадр
+USE_ANSWER_CACHE = USE_MQTT_IMAGES
 
 IMAGE_HTTP_TIMEOUT = 3.0 
 GEMINI_TIMEOUT = 12.0    
+GEMINI_IMAGE_MAX_EDGE = 1024
+GEMINI_MAX_CONCURRENCY = 5  # подстрой под лимиты своего аккаунта
 WATER_ALERT_INTERVAL = 60 
+WATER_ALERT_MAX_BACKOFF = 3600
+MQTT_CLIENT_ID = "greenhouse-bot"
+MQTT_KEEPALIVE = 30
+MQTT_RECONNECT_MIN_DELAY = 1.0
+MQTT_RECONNECT_MAX_DELAY = 60.0
 
 # -------------------- Logging --------------------
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s: %(message)s")
@@ -48,11 +61,36 @@ logger = logging.getLogger(__name__)
 sensor_data = {"Soil": "N/A", "Temp": "N/A", "Hum": "N/A", "Water": "N/A"}
 current_threshold = 30
 last_image_bytes: Optional[bytes] = None
-last_image_ts: Optional[datetime] = None
+last_image_mono: Optional[float] = None
+# MQTT frame not decoded yet, see get_last_image(); replaces last_image_* only once it decodes
+last_image_b64: Optional[str] = None
+_pending_image_mono: Optional[float] = None
+_LAST_PAYLOAD: Optional[str] = None
+# "soil,temp,hum,water" as published by the ESP32; DHT read failures come through as "nan"
+_SENSOR_RE = re.compile(
+    r"^\s*(-?\d+)\s*,\s*(-?\d+(?:\.\d*)?|nan)\s*,\s*(-?\d+(?:\.\d*)?|nan)\s*,\s*([01])\s*$"
+)
+_DATA_STR_CACHE: Optional[str] = None
+_last_alert_mono = 0.0
+_alert_backoff = WATER_ALERT_INTERVAL
 
 
 NOTIFY_CHAT_ID: Optional[int] = None
 
+HTTP_SESSION: Optional[aiohttp.ClientSession] = None
+
+# set by dispatch() when a new image arrives over MQTT
+IMAGE_EVENT = asyncio.Event()
+
+MQTT_CLIENT: Optional[aiomqtt.Client] = None
+MQTT_TASK: Optional[asyncio.Task] = None
+
+# caps in-flight Gemini requests
+GEMINI_SEM = asyncio.Semaphore(GEMINI_MAX_CONCURRENCY)
+
+# (question, data string, image timestamp) -> Gemini answer
+ANSWER_CACHE: TTLCache = TTLCache(maxsize=128, ttl=60)
+
 # -------------------- Gemini client init --------------------
 if GEMINI_API_KEY and not GEMINI_API_KEY.startswith("PUT_"):
     try:
@@ -65,20 +103,10 @@ else:
     gemini_client = None
     logger.info("Gemini disabled (no valid API key).")
 
-# -------------------- MQTT callbacks --------------------
-def on_connect(client, userdata, flags, rc):
-    logger.info(f"Connected to MQTT broker with code {rc}")
-    try:
-        client.subscribe(DATA_TOPIC)
-        if USE_MQTT_IMAGES:
-            client.subscribe(IMAGE_TOPIC)
-    except Exception as e:
-        logger.error(f"MQTT subscribe error: {e}")
-
-
-def on_message(client, userdata, msg):
-    global sensor_data, last_image_bytes, last_image_ts
-    topic = msg.topic
+# -------------------- MQTT --------------------
+async def dispatch(msg: aiomqtt.Message):
+    global sensor_data, last_image_b64, _pending_image_mono, _LAST_PAYLOAD, _DATA_STR_CACHE
+    topic = msg.topic.value
     try:
         payload = msg.payload.decode(errors="ignore")
     except Exception:
@@ -86,104 +114,168 @@ def on_message(client, userdata, msg):
 
     if topic == DATA_TOPIC:
  
-        try:
-            parts = str(payload).split(",")
-            if len(parts) >= 4:
-                sensor_data["Soil"] = parts[0].strip()
-                sensor_data["Temp"] = parts[1].strip()
-                sensor_data["Hum"] = parts[2].strip()
-                sensor_data["Water"] = "OK" if parts[3].strip() == "1" else "ПУСТО"
-                logger.info(f"Sensor update: {sensor_data}")
-        except Exception as e:
-            logger.error(f"Failed to parse sensor payload: {e}")
+        payload = str(payload)
+        if payload == _LAST_PAYLOAD:
+            return
+        m = _SENSOR_RE.match(payload)
+        if not m:
+            logger.warning(f"Malformed sensor payload: {payload!r}")
+            return
+        soil, temp, hum, water = m.groups()
+        sensor_data["Soil"] = soil
+        sensor_data["Temp"] = temp
+        sensor_data["Hum"] = hum
+        sensor_data["Water"] = "OK" if water == "1" else "ПУСТО"
+        _LAST_PAYLOAD = payload
+        _DATA_STR_CACHE = None
+        logger.info(f"Sensor update: {sensor_data}")
 
     elif USE_MQTT_IMAGES and topic == IMAGE_TOPIC:
  
-        try:
-            b64 = str(payload).strip()
-            b = base64.b64decode(b64)
-            last_image_bytes = b
-            last_image_ts = datetime.utcnow()
-            logger.info(f"Received image via MQTT ({len(b)} bytes) at {last_image_ts} UTC")
-        except Exception as e:
-            logger.error(f"Failed to decode image from MQTT: {e}")
+        last_image_b64 = str(payload).strip()
+        _pending_image_mono = time.monotonic()
+        logger.info(f"Received image via MQTT ({len(last_image_b64)} base64 chars)")
+        IMAGE_EVENT.set()
     else:
         logger.debug(f"MQTT message on {topic}: {payload}")
 
 
+async def mqtt_consumer():
+    global MQTT_CLIENT
+    delay = MQTT_RECONNECT_MIN_DELAY
+    while True:
+        try:
+            # persistent session + QoS 1 so sensor packets sent during a reconnect are not lost
+            async with aiomqtt.Client(
+                MQTT_SERVER,
+                MQTT_PORT,
+                username=MQTT_USERNAME,
+                password=MQTT_PASSWORD,
+                identifier=MQTT_CLIENT_ID,
+                clean_session=False,
+                keepalive=MQTT_KEEPALIVE,
+            ) as client:
+                MQTT_CLIENT = client
+                delay = MQTT_RECONNECT_MIN_DELAY
+                logger.info("Connected to MQTT broker.")
+                await client.subscribe(DATA_TOPIC, qos=1)
+                if USE_MQTT_IMAGES:
+                    await client.subscribe(IMAGE_TOPIC)
+                async for msg in client.messages:
+                    await dispatch(msg)
+        except aiomqtt.MqttError as e:
+            logger.error(f"MQTT connection error: {e}. Reconnecting in {delay}s")
+        except Exception:
+            logger.exception(f"Unexpected MQTT consumer error. Reconnecting in {delay}s")
+        finally:
+            MQTT_CLIENT = None
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, MQTT_RECONNECT_MAX_DELAY)
 
-mqtt_client = mqtt.Client()
-mqtt_client.username_pw_set(MQTT_USERNAME, MQTT_PASSWORD)
-mqtt_client.on_connect = on_connect
-mqtt_client.on_message = on_message
-try:
-    mqtt_client.connect(MQTT_SERVER, MQTT_PORT, 60)
-    mqtt_client.loop_start()
-    logger.info("MQTT client started.")
-except Exception as e:
-    logger.error(f"Failed to connect to MQTT broker: {e}")
-
-# -------------------- Helpers --------------------
-async def get_data_string() -> str:
-    return (
-        f"🌱 Почва: {sensor_data['Soil']}%\n"
-        f"🌡️ Температура: {sensor_data['Temp']}°C\n"
-        f"💧 Влажность: {sensor_data['Hum']}%\n"
-        f"🌊 Бак: {sensor_data['Water']}\n"
-        f"🎯 Порог полива: {current_threshold}%"
-    )
 
+async def mqtt_publish(topic: str, payload: str) -> bool:
+    if MQTT_CLIENT is None:
+        logger.warning(f"MQTT not connected, dropping publish to {topic}")
+        return False
+    try:
+        await MQTT_CLIENT.publish(topic, payload)
+        return True
+    except aiomqtt.MqttError as e:
+        logger.error(f"MQTT publish error: {e}")
+        return False
 
-def bytes_to_io_photo(b: bytes) -> io.BytesIO:
-    bio = io.BytesIO(b)
-    bio.name = "photo.jpg"
-    bio.seek(0)
-    return bio
+# -------------------- Helpers --------------------
+def get_data_string() -> str:
+    global _DATA_STR_CACHE
+    if _DATA_STR_CACHE is None:
+        _DATA_STR_CACHE = (
+            f"🌱 Почва: {sensor_data['Soil']}%\n"
+            f"🌡️ Температура: {sensor_data['Temp']}°C\n"
+            f"💧 Влажность: {sensor_data['Hum']}%\n"
+            f"🌊 Бак: {sensor_data['Water']}\n"
+            f"🎯 Порог полива: {current_threshold}%"
+        )
+    return _DATA_STR_CACHE
 
 
 async def fetch_photo_via_http(timeout: float = IMAGE_HTTP_TIMEOUT) -> Optional[bytes]:
+    global last_image_bytes, last_image_b64, last_image_mono
     url = f"http://{ESP32_CAM_IP}{ESP32_CAM_CAPTURE_PATH}"
     logger.debug(f"Fetching photo from {url} (timeout {timeout}s)")
+    if HTTP_SESSION is None:
+        logger.warning("HTTP session is not initialized")
+        return None
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, timeout=timeout) as resp:
-                if resp.status == 200:
-                    data = await resp.read()
-                    logger.info(f"Got {len(data)} bytes from ESP32-CAM HTTP")
-                    return data
-                else:
-                    logger.warning(f"ESP32-CAM returned HTTP {resp.status}")
-                    return None
+        async with HTTP_SESSION.get(url, timeout=aiohttp.ClientTimeout(total=timeout)) as resp:
+            if resp.status == 200:
+                data = await resp.read()
+                last_image_bytes = data
+                last_image_b64 = None
+                last_image_mono = time.monotonic()
+                logger.info(f"Got {len(data)} bytes from ESP32-CAM HTTP")
+                return data
+            else:
+                logger.warning(f"ESP32-CAM returned HTTP {resp.status}")
+                return None
     except Exception as e:
         logger.debug(f"HTTP fetch error: {e}")
         return None
 
 
-async def wait_for_mqtt_image(timeout: float = 6.0) -> Optional[bytes]:
-    waited = 0.0
-    interval = 0.25
-    global last_image_bytes
-    while waited < timeout:
-        if last_image_bytes:
-            return last_image_bytes
-        await asyncio.sleep(interval)
-        waited += interval
-    return None
+def preprocess_jpeg(b: bytes, max_edge: int = GEMINI_IMAGE_MAX_EDGE) -> bytes:
+    im = Image.open(io.BytesIO(b))
+    if max(im.size) <= max_edge:
+        return b
+    if im.mode != "RGB":
+        im = im.convert("RGB")
+    im.thumbnail((max_edge, max_edge), Image.LANCZOS)
+    out = io.BytesIO()
+    im.save(out, "JPEG", quality=85, optimize=True)
+    return out.getvalue()
+
+
+async def image_part_for_gemini(b: bytes) -> types.Part:
+    loop = asyncio.get_running_loop()
+    try:
+        b = await loop.run_in_executor(None, preprocess_jpeg, b)
+    except Exception as e:
+        logger.warning(f"Image downscale failed, sending original: {e}")
+    return types.Part.from_bytes(data=b, mime_type="image/jpeg")
 
 
+def get_last_image() -> Optional[bytes]:
+    global last_image_bytes, last_image_b64, last_image_mono
+    if last_image_b64 is not None:
+        try:
+            last_image_bytes = base64.b64decode(last_image_b64, validate=True)
+            last_image_mono = _pending_image_mono
+        except Exception as e:
+            # keep serving the previous good frame
+            logger.error(f"Failed to decode image from MQTT: {e}")
+        last_image_b64 = None
+    return last_image_bytes
+
+
+async def wait_for_mqtt_image(timeout: float = 6.0) -> Optional[bytes]:
+    # caller clears IMAGE_EVENT before requesting a frame; on timeout fall back to the last one
+    try:
+        await asyncio.wait_for(IMAGE_EVENT.wait(), timeout=timeout)
+    except asyncio.TimeoutError:
+        return get_last_image()
+    IMAGE_EVENT.clear()
+    return get_last_image()
+
 
 async def call_gemini_with_timeout(contents, timeout: float = GEMINI_TIMEOUT) -> str:
     if gemini_client is None:
         raise RuntimeError("Gemini client is not initialized")
 
-    loop = asyncio.get_running_loop()
-
-    def blocking_call():
-        return gemini_client.models.generate_content(model="gemini-2.5-flash", contents=contents)
-
     try:
-        future = loop.run_in_executor(None, blocking_call)
-        resp = await asyncio.wait_for(future, timeout=timeout)
+        async with GEMINI_SEM:
+            resp = await asyncio.wait_for(
+                gemini_client.aio.models.generate_content(model="gemini-2.5-flash", contents=contents),
+                timeout=timeout,
+            )
         text = getattr(resp, "text", None) or str(resp)
         return text
     except asyncio.TimeoutError:
@@ -194,6 +286,14 @@ async def call_gemini_with_timeout(contents, timeout: float = GEMINI_TIMEOUT) ->
         raise e
 
 # -------------------- Telegram Handlers --------------------
+async def wait_ack(ack: asyncio.Task):
+    # progress message is cosmetic: order it before the real reply, but never let it fail the handler
+    try:
+        await ack
+    except Exception as e:
+        logger.warning(f"Failed to send progress message: {e}")
+
+
 async def cmd_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     global NOTIFY_CHAT_ID
     NOTIFY_CHAT_ID = update.effective_chat.id
@@ -223,16 +323,17 @@ async def cmd_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 
 async def cmd_data(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    await update.message.reply_text(await get_data_string())
+    await update.message.reply_text(get_data_string())
 
 
 async def cmd_set(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    global current_threshold
+    global current_threshold, _DATA_STR_CACHE
     try:
         new_th = int(context.args[0])
         if 0 < new_th < 100:
-            mqtt_client.publish(CONTROL_TOPIC, str(new_th))
+            await mqtt_publish(CONTROL_TOPIC, str(new_th))
             current_threshold = new_th
+            _DATA_STR_CACHE = None
             await update.message.reply_text(f"✅ Порог установлен: {new_th}%")
         else:
             await update.message.reply_text("Порог должен быть числом от 1 до 99.")
@@ -241,17 +342,18 @@ async def cmd_set(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 
 async def cmd_photo(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    await update.message.reply_text("📸 Запрашиваю фото с ESP32-CAM...")
+    ack = context.application.create_task(update.message.reply_text("📸 Запрашиваю фото с ESP32-CAM..."))
     img = None
     if not USE_MQTT_IMAGES:
         img = await fetch_photo_via_http(timeout=IMAGE_HTTP_TIMEOUT)
     else:
-        mqtt_client.publish(CONTROL_TOPIC, "PHOTO")
+        IMAGE_EVENT.clear()
+        await mqtt_publish(CONTROL_TOPIC, "PHOTO")
         img = await wait_for_mqtt_image(timeout=IMAGE_HTTP_TIMEOUT)
 
+    await wait_ack(ack)
     if img:
-        bio = bytes_to_io_photo(img)
-        await update.message.reply_photo(photo=bio, caption="Вот текущее фото 🌿")
+        await update.message.reply_photo(photo=img, caption="Вот текущее фото 🌿")
     else:
         await update.message.reply_text("❌ Не удалось получить фото. Проверь ESP32-CAM и сеть.")
 
@@ -259,22 +361,15 @@ async def cmd_photo(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def handle_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if update.message is None or update.message.text is None:
         return
-    user_question = update.message.text.strip()
-    if user_question.startswith("/"):
+    user_question = update.message.text
+    if not user_question:
         return
 
-    await update.message.reply_text("🧠 Анализирую данные и фото...")
+    ack = context.application.create_task(update.message.reply_text("🧠 Анализирую данные и фото..."))
 
    
-    data_str = await get_data_string()
-
-   
-    img_bytes: Optional[bytes] = None
-    if not USE_MQTT_IMAGES:
-        img_bytes = await fetch_photo_via_http(timeout=2.5)
-    else:
-        if last_image_bytes:
-            img_bytes = last_image_bytes
+    data_str = get_data_string()
+    img_bytes = await fetch_photo_via_http(timeout=2.5) if not USE_MQTT_IMAGES else get_last_image()
 
 
     prompt_text = (
@@ -285,23 +380,38 @@ async def handle_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
     )
 
     if gemini_client is None:
+        await wait_ack(ack)
         await update.message.reply_text("❌ Gemini не настроен. Отвечаю только по данным:\n" + data_str)
         return
 
+    key = (user_question, data_str, last_image_mono if img_bytes else None)
+    cached = ANSWER_CACHE.get(key) if USE_ANSWER_CACHE else None
+    if cached is not None:
+        await wait_ack(ack)
+        await update.message.reply_text(cached)
+        return
+
     try:
-        contents = [{"text": prompt_text}]
+        contents = [prompt_text]
         if img_bytes:
-            contents.append({"image": {"mime_type": "image/jpeg", "data": base64.b64encode(img_bytes).decode("utf-8")}})
+            contents.append(await image_part_for_gemini(img_bytes))
         # call Gemini with timeout
         text = await call_gemini_with_timeout(contents, timeout=GEMINI_TIMEOUT)
+        if USE_ANSWER_CACHE:
+            ANSWER_CACHE[key] = text
+        # the ack runs concurrently with the work above but must reach the chat first
+        await wait_ack(ack)
         await update.message.reply_text(text)
     except TimeoutError:
+        await wait_ack(ack)
         await update.message.reply_text("❌ Gemini не ответил вовремя (таймаут). Попробуй снова.")
     except APIError as e:
         logger.error(f"Gemini APIError: {e}")
+        await wait_ack(ack)
         await update.message.reply_text("❌ Ошибка Gemini API: проверь ключ / лимиты.")
     except Exception as e:
         logger.exception("Unexpected error while calling Gemini")
+        await wait_ack(ack)
         await update.message.reply_text(f"❌ Ошибка при анализе: {e}")
 
 
@@ -309,39 +419,53 @@ async def handle_user_photo(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if update.message is None or update.message.photo is None:
         return
 
-    await update.message.reply_text("🧠 Получил фото — анализирую...")
+    ack = context.application.create_task(update.message.reply_text("🧠 Получил фото — анализирую..."))
     photo = update.message.photo[-1]
     file = await photo.get_file()
-    bio = io.BytesIO()
-    await file.download_to_memory(out=bio)
-    img_bytes = bio.getvalue()
+    img_bytes = bytes(await file.download_as_bytearray())
 
     if gemini_client is None:
+        await wait_ack(ack)
         await update.message.reply_text("❌ Gemini не настроен. Фото получено, но анализ недоступен.")
         return
 
     try:
         contents = [
-            {"text": "Ты опытный агроном. Проанализируй это фото и дай краткие практические советы."},
-            {"image": {"mime_type": "image/jpeg", "data": base64.b64encode(img_bytes).decode("utf-8")}},
+            "Ты опытный агроном. Проанализируй это фото и дай краткие практические советы.",
+            await image_part_for_gemini(img_bytes),
         ]
         text = await call_gemini_with_timeout(contents, timeout=GEMINI_TIMEOUT)
+        await wait_ack(ack)
         await update.message.reply_text(text)
     except TimeoutError:
+        await wait_ack(ack)
         await update.message.reply_text("❌ Gemini не ответил вовремя (таймаут).")
     except Exception as e:
         logger.exception("Error analyzing user photo")
+        await wait_ack(ack)
         await update.message.reply_text(f"❌ Ошибка при анализе фото: {e}")
 
 
 # -------------------- Water alert job --------------------
 async def water_alert_job(context: ContextTypes.DEFAULT_TYPE):
+    global _last_alert_mono, _alert_backoff
     try:
         chat_id = getattr(context.job, "chat_id", None) or NOTIFY_CHAT_ID
         if not chat_id:
             return
-        if sensor_data.get("Water") != "OK":
-            await context.bot.send_message(chat_id=chat_id, text="⚠️ ВНИМАНИЕ: Бак для воды пуст!")
+        if sensor_data.get("Water") == "OK":
+            _alert_backoff = WATER_ALERT_INTERVAL
+            _last_alert_mono = 0.0
+            return
+        # repeat the alert at 1, 2, 4, ... x WATER_ALERT_INTERVAL while the tank stays empty;
+        # half a period of slack absorbs job scheduling jitter
+        now = time.monotonic()
+        if _last_alert_mono and now - _last_alert_mono < _alert_backoff - WATER_ALERT_INTERVAL / 2:
+            return
+        await context.bot.send_message(chat_id=chat_id, text="⚠️ ВНИМАНИЕ: Бак для воды пуст!")
+        if _last_alert_mono:
+            _alert_backoff = min(_alert_backoff * 2, WATER_ALERT_MAX_BACKOFF)
+        _last_alert_mono = now
     except Exception as e:
         logger.debug(f"water_alert_job exception: {e}")
 
@@ -349,13 +473,52 @@ async def water_alert_job(context: ContextTypes.DEFAULT_TYPE):
 # -------------------- Main --------------------
 from telegram.ext import JobQueue
 
+
+async def post_init(application: Application):
+    global HTTP_SESSION, MQTT_TASK
+    # one keep-alive session for all ESP32-CAM grabs, created inside the running loop
+    HTTP_SESSION = aiohttp.ClientSession(
+        timeout=aiohttp.ClientTimeout(total=IMAGE_HTTP_TIMEOUT),
+        connector=aiohttp.TCPConnector(limit=4, ttl_dns_cache=300, keepalive_timeout=30),
+    )
+    logger.info("HTTP session created.")
+    MQTT_TASK = asyncio.create_task(mqtt_consumer())
+    logger.info("MQTT consumer started.")
+
+
+async def post_shutdown(application: Application):
+    global HTTP_SESSION, MQTT_TASK
+    try:
+        if MQTT_TASK is not None:
+            MQTT_TASK.cancel()
+            try:
+                await MQTT_TASK
+            except asyncio.CancelledError:
+                pass
+            except Exception:
+                logger.exception("MQTT consumer exited with an error")
+            MQTT_TASK = None
+            logger.info("MQTT consumer stopped.")
+    finally:
+        if HTTP_SESSION is not None:
+            await HTTP_SESSION.close()
+            HTTP_SESSION = None
+            logger.info("HTTP session closed.")
+
+
 def main():
     if not TELEGRAM_TOKEN or TELEGRAM_TOKEN.startswith("PUT_"):
         logger.error("Set TELEGRAM_TOKEN in script before running.")
         return
 
 
-    app = Application.builder().token(TELEGRAM_TOKEN).build()
+    app = (
+        Application.builder()
+        .token(TELEGRAM_TOKEN)
+        .post_init(post_init)
+        .post_shutdown(post_shutdown)
+        .build()
+    )
 
 
     app.add_handler(CommandHandler("start", cmd_start))
@@ -363,7 +526,7 @@ def main():
     app.add_handler(CommandHandler("set", cmd_set))
     app.add_handler(CommandHandler("photo", cmd_photo))
     app.add_handler(MessageHandler(filters.PHOTO, handle_user_photo))
-    app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_text))
+    app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND & ~filters.UpdateType.EDITED, handle_text))
 
     logger.info("Bot starting (polling)...")
     app.run_polling(poll_interval=1.0)